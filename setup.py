@@ -29,6 +29,7 @@ setup(
     ],
     keywords="apple mobileconfig manifest sphinx extension",
     packages=find_packages(exclude=["tests"]),
+    package_data={'sphinxcontrib.pfmanifest': ['static/*']},
     platforms='any',
     namespace_packages=['sphinxcontrib'],
     install_requires=requires,
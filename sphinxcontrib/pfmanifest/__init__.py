@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+    sphinxcontrib.pfmanifest
+    ~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Generate tables from apple preference manifests.
+
+    The directives are imported when sphinx loads the extension, so that ``python -m sphinxcontrib.pfmanifest``
+    can query manifests without importing docutils or sphinx.
+
+    :license: MIT
+"""
+
+
+def setup(app):
+    from .directives import setup
+    return setup(app)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+    sphinxcontrib.pfmanifest.__main__
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Query preference manifests from the command line, using a persisted index of a manifest directory.
+
+    Example::
+
+        python -m sphinxcontrib.pfmanifest -d manifests lookup com.apple.wifi.managed EAPClientConfiguration:*
+        python -m sphinxcontrib.pfmanifest -d manifests grep -i password
+        python -m sphinxcontrib.pfmanifest -d manifests --json dump com.apple.font
+
+    :license: MIT
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import re
+import sys
+
+from .index import SPEC_FIELDS, ManifestIndex, format_value
+
+
+def format_key(domain, path, fields):
+    """
+    Format a key as text, with the same fields that the pfmkey directive renders.
+    """
+    lines = [u'{0} {1}'.format(domain, ':'.join(path)),
+             u'  Title: {0}'.format(fields.get('pfm_title', 'Title not available')),
+             u'  Description: {0}'.format(fields.get('pfm_description', 'Description not available'))]
+    for k, heading in SPEC_FIELDS:
+        lines.append(u'  {0}: {1}'.format(heading, format_value(fields.get(k, 'N/A'))))
+    if 'pfm_range_list' in fields:
+        lines.append(u'  Valid Choices: {0}'.format(format_value(fields['pfm_range_list'])))
+
+    return u'\n'.join(lines)
+
+
+def output(args, matches):
+    if args.json:
+        json.dump([{'domain': d, 'path': list(p), 'fields': f} for d, p, f in matches], sys.stdout, indent=2)
+        print()
+    elif args.command == 'grep':
+        for d, p, f in matches:
+            print(u'{0} {1}: {2}'.format(d, ':'.join(p), f.get('pfm_title', '')))
+    else:
+        print(u'\n\n'.join(format_key(d, p, f) for d, p, f in matches))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m sphinxcontrib.pfmanifest',
+                                     description='Query apple preference manifests.')
+    parser.add_argument('-d', '--directory', default='.', help='directory containing the manifests')
+    parser.add_argument('--index', help='index file, defaults to .pfmindex.json in the manifest directory')
+    parser.add_argument('--pattern', default='*.plist', help='manifest file name pattern')
+    parser.add_argument('--json', action='store_true', help='write matching keys as JSON')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    lookup = subparsers.add_parser('lookup', help='show keys by path, as accepted by the pfmkey directive')
+    lookup.add_argument('domain', help='pfm_domain of the manifest')
+    lookup.add_argument('path', help='comma separated key paths, which may contain * ? and ** wildcards')
+
+    grep = subparsers.add_parser('grep', help='search key names, titles and descriptions')
+    grep.add_argument('-i', '--ignore-case', action='store_true')
+    grep.add_argument('regex')
+    grep.add_argument('domain', nargs='?', help='only search the manifest with this pfm_domain')
+
+    dump = subparsers.add_parser('dump', help='show every key of a manifest')
+    dump.add_argument('domain', help='pfm_domain of the manifest')
+
+    args = parser.parse_args(argv)
+
+    try:
+        index = ManifestIndex.load(args.directory, args.index, args.pattern)
+    except (IOError, OSError) as err:
+        parser.exit(1, 'Preference Manifest directory "{0}" cannot be read: {1}\n'.format(args.directory, err))
+
+    for filename, err in index.errors:
+        print('Preference Manifest file "{0}" cannot be read: {1}'.format(filename, err), file=sys.stderr)
+    if index.save_error is not None:
+        print('Preference Manifest index cannot be saved, answering without it: {0}'.format(index.save_error),
+              file=sys.stderr)
+
+    if args.domain is not None and args.domain not in index.domains():
+        parser.exit(1, 'No Preference Manifest with pfm_domain "{0}" exists in "{1}".\n'.format(
+            args.domain, args.directory))
+
+    if args.command == 'lookup':
+        matches = [(args.domain, p, f) for p, f in index.lookup(args.domain, args.path)]
+        if not matches:
+            parser.exit(1, 'No pfm_name "{0}" exists in manifest "{1}".\n'.format(args.path, args.domain))
+    elif args.command == 'grep':
+        try:
+            regex = re.compile(args.regex, re.IGNORECASE if args.ignore_case else 0)
+        except re.error as err:
+            parser.error('invalid regex "{0}": {1}'.format(args.regex, err))
+        matches = index.grep(regex, args.domain)
+        if not matches:
+            return 1
+    else:
+        matches = [(args.domain, p, f) for p, f in index.keys(args.domain).items()]
+
+    output(args, matches)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
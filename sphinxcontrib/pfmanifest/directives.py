@@ -0,0 +1,794 @@
+# -*- coding: utf-8 -*-
+"""
+    sphinxcontrib.pfmanifest.directives
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Generate tables from apple preference manifests.
+
+    :license: MIT
+"""
+
+import gzip
+import hashlib
+import json
+import os.path
+import re
+from docutils import nodes
+from docutils.parsers.rst import Directive, directives
+from sphinx.errors import SphinxError
+from sphinx.util.osutil import relative_uri
+
+from .index import HEADER_KEYS, PLIST_ERRORS, SPEC_FIELDS, SUMMARY_KEYS, format_value, index_subkeys, \
+    list_manifests, match_subkey_patterns, read_plist, scan_manifest_headers, split_key_patterns, version_tuple
+
+try:
+    from html import escape
+except ImportError:  # Python 2
+    from cgi import escape
+
+try:
+    from sphinx.util.i18n import search_image_for_language
+except ImportError:  # Sphinx < 1.4
+    def search_image_for_language(filename, env):
+        return filename
+
+
+class PfmKeyDirective(Directive):
+    """
+    Directive to render information about payload keys as sections.
+
+    Example::
+
+        To render information about the payload key "SSID_STR" from a manifest file.
+
+        .. pfmkey::SSID_STR com.apple.wifi.managed manifest.plist
+
+        To render a nested key use : (colon) as a path separator
+
+        .. pfmkey::EAPClientConfiguration:AcceptEAPTypes manifests/manual/com.apple.wifi.managed manifest.plist
+
+        To render several keys from one read of the manifest, separate paths with , (comma). Spaces may follow the
+        commas, but not appear within a path. Path segments may use * and ? wildcards, and a ** segment matches keys
+        at any depth. Nested keys are titled with their full path.
+
+        .. pfmkey::SSID_STR, EAPClientConfiguration:*, **:Password* com.apple.wifi.managed manifest.plist
+
+    TODO: pfm_conditionals.pfm_target_conditions (only enabled when these conditions are met)
+    TODO: pfm_exclude
+    TODO: pfm_require "push", "always"
+    """
+
+    # The key paths and file name are split by `split_arguments`, so that spaces may follow commas in the key paths.
+    required_arguments = 1
+    final_argument_whitespace = True
+    has_content = False
+
+    arguments_re = re.compile(r'^\s*([^\s,]+(?:\s*,\s*[^\s,]+)*)\s+(\S.*)$')
+
+    def split_arguments(self):
+        """
+        Split the directive argument into key patterns and the manifest file name.
+
+        :return: tuple of (list of patterns, file name)
+        """
+        match = self.arguments_re.match(self.arguments[0])
+        if match is None:
+            raise self.error('pfmkey requires one or more key paths followed by a manifest file name.')
+
+        return split_key_patterns(match.group(1)), match.group(2)
+
+    def build_spec_table(self, data):
+        """
+        Build a table including the data type, format required, etc of this key.
+        :return: nodes.table
+        """
+        headings = [heading for _, heading in SPEC_FIELDS]
+        table = nodes.table()
+
+        tgroup = nodes.tgroup(cols=len(headings))
+        table += tgroup
+
+        colwidths = (1, 1, 1, 1, 1, 1, 1)
+        for colwidth in colwidths:
+            tgroup += nodes.colspec(colwidth=colwidth)
+
+        thead = nodes.thead()
+        tgroup += thead
+
+        th_row = nodes.row()
+        thead += th_row
+
+        for head in headings:
+            entry = nodes.entry()
+            th_row += entry
+            entry += nodes.paragraph(text=head)
+
+        tbody = nodes.tbody()
+        tgroup += tbody
+
+        tdrow = nodes.row()
+        tbody += tdrow
+
+        for k, _ in SPEC_FIELDS:
+            entry = nodes.entry()
+            entry += nodes.paragraph(text=data.get(k, 'N/A'))
+            tdrow += entry
+
+        return table
+
+    def build_choice_list(self, pfm_range_list):
+        """
+        Build a list containing possible value choices from `pfm_range_list`.
+        :param data:
+        :return:
+        """
+        choices = nodes.bullet_list()
+        for choice in pfm_range_list:
+            item = nodes.list_item()
+            p = nodes.paragraph(text=choice)
+            item += p
+            choices += item
+
+        return choices
+
+
+    def build_section(self, data, path, kd):
+        """
+        Build a section describing a single key.
+
+        :param data: the manifest the key belongs to
+        :param path: tuple of pfm_name values locating the key
+        :param kd: dict item from pfm_subkeys
+        :return: nodes.section
+        """
+        targetid = "{0}-{1}-{2}".format(data.get('pfm_domain', 'pref.domain.na'), '-'.join(path), 'auto')
+        section = nodes.section(ids=[targetid])
+
+        section += nodes.title(text=':'.join(path))
+        section += nodes.paragraph(text=kd.get('pfm_title', 'Title not available'))
+        section += nodes.paragraph(text=kd.get('pfm_description', 'Description not available'))
+        section += self.build_spec_table(kd)
+
+        if 'pfm_range_list' in kd:
+            section += nodes.title(text='Valid Choices')
+            section += self.build_choice_list(kd['pfm_range_list'])
+
+        # if 'pfm_subkeys' in kd:
+        # recursive render
+
+        return section
+
+    def run(self):
+        warning = self.state.document.reporter.warning
+        env = self.state.document.settings.env
+
+        patterns, filename = self.split_arguments()
+        fn = search_image_for_language(filename, env)
+        relfn, absfn = env.relfn2path(fn)
+        env.note_dependency(relfn)
+        try:
+            data = read_plist(absfn)
+        except IOError as err:
+            return [warning('Preference Manifest file "%s" cannot be read: %s'
+                            % (fn, err), line=self.lineno)]
+
+        matches, unmatched = match_subkey_patterns(index_subkeys(data), patterns)
+        result = [warning('No pfm_name "%s" exists in manifest "%s".' % (pattern, filename), line=self.lineno)
+                  for pattern in unmatched]
+        result.extend(self.build_section(data, path, kd) for path, kd in matches)
+
+        return result
+
+class PfmHeaderDirective(Directive):
+    """
+    Directive to render top level key values as a definition list.
+
+    Example::
+
+        .. pfmheader:: test.manifest
+
+    """
+    has_content = False
+    required_arguments = 1
+    final_argument_whitespace = True
+
+    header_keys = HEADER_KEYS
+    headers = {
+        'pfm_domain': 'PayloadType',
+        'pfm_supervised': 'Supervised Only',
+        'pfm_macos_min': 'macOS',
+        'pfm_macos_max': 'macOS Deprecated',
+        'pfm_ios_min': 'iOS',
+        'pfm_ios_max': 'iOS Deprecated',
+        'pfm_unique': 'Highlander'
+    }
+
+    def field_list_item(self, label, value):
+        field = nodes.field()
+        field += nodes.field_name(text=label)
+        fb = nodes.field_body()
+        field += fb
+        fb += nodes.paragraph(text=value)
+        return field
+
+    def run(self):
+        warning = self.state.document.reporter.warning
+        env = self.state.document.settings.env
+        fn = search_image_for_language(self.arguments[0], env)
+        relfn, absfn = env.relfn2path(fn)
+        env.note_dependency(relfn)
+        try:
+            pfmanifestdata = read_plist(absfn)
+        except IOError as err:
+            return [warning('Preference Manifest file "%s" cannot be read: %s'
+                            % (fn, err), line=self.lineno)]
+
+        fl = nodes.field_list()
+
+        for k in self.header_keys:
+            if k in pfmanifestdata:
+                fl += self.field_list_item(self.headers[k], pfmanifestdata.get(k, 'N/A'))
+            else:
+                fl += self.field_list_item(self.headers[k], 'N/A')
+
+        return [fl]
+
+
+class PfmIndexDirective(Directive):
+    """
+    Directive to render a summary table of every manifest found in a directory.
+
+    Only the top level header keys of each manifest are retained, and the summaries are cached between builds.
+    The document is read again whenever a manifest is added to or removed from the directory.
+
+    Example::
+
+        .. pfmindex:: manifests
+           :pattern: com.apple.*.plist
+           :sort: macos
+           :reverse:
+    """
+    has_content = False
+    required_arguments = 1
+    final_argument_whitespace = True
+
+    columns = (
+        ('domain', 'Domain', 'pfm_domain'),
+        ('title', 'Title', 'pfm_title'),
+        ('macos', 'macOS', 'pfm_macos_min'),
+        ('ios', 'iOS', 'pfm_ios_min'),
+        ('supervised', 'Supervised Only', 'pfm_supervised'),
+        ('keys', 'Keys', 'key_count'),
+    )
+    option_spec = {
+        'pattern': directives.unchanged,
+        'sort': lambda v: directives.choice(v, [c[0] for c in PfmIndexDirective.columns]),
+        'reverse': directives.flag
+    }
+    header_keys = SUMMARY_KEYS
+    sort_values = {
+        'macos': version_tuple,
+        'ios': version_tuple,
+        'keys': int
+    }
+
+    def run(self):
+        warning = self.state.document.reporter.warning
+        env = self.state.document.settings.env
+        reldir, absdir = env.relfn2path(self.arguments[0])
+        pattern = self.options.get('pattern', '*.plist')
+
+        # The manifests are dependencies for changes to their content, and the directory listing is checked by
+        # `get_outdated_listings` for manifests added or removed.
+        try:
+            manifests = scan_manifest_headers(env, absdir, pattern, self.header_keys)
+        except (IOError, OSError) as err:
+            note_directory_listing(env, absdir, pattern, None)
+            return [warning('Preference Manifest directory "%s" cannot be read: %s'
+                            % (self.arguments[0], err), line=self.lineno)]
+
+        note_directory_listing(env, absdir, pattern, [filename for filename, _ in manifests])
+
+        result = []
+        headers = []
+        for filename, header in manifests:
+            env.note_dependency(os.path.join(reldir, filename))
+            if isinstance(header, Exception):
+                result.append(warning('Preference Manifest file "%s" cannot be read: %s'
+                                      % (filename, header), line=self.lineno))
+            else:
+                headers.append(header)
+
+        sort = self.options.get('sort', 'domain')
+        sort_key = dict((c[0], c[2]) for c in self.columns)[sort]
+        sort_value = self.sort_values.get(sort, lambda v: u'{0}'.format(v))
+
+        # Manifests without a value for the sorted column are always listed last.
+        missing = [h for h in headers if sort_key not in h]
+        headers = sorted([h for h in headers if sort_key in h], key=lambda h: sort_value(h[sort_key]),
+                         reverse='reverse' in self.options) + missing
+
+        table = nodes.table(classes=['pfmindex'])
+
+        tgroup = nodes.tgroup(cols=len(self.columns))
+        table += tgroup
+
+        colwidths = (2, 3, 1, 1, 1, 1)
+        for colwidth in colwidths:
+            tgroup += nodes.colspec(colwidth=colwidth)
+
+        thead = nodes.thead()
+        tgroup += thead
+
+        th_row = nodes.row()
+        thead += th_row
+
+        for _, head, _ in self.columns:
+            entry = nodes.entry()
+            th_row += entry
+            entry += nodes.paragraph(text=head)
+
+        tbody = nodes.tbody()
+        tgroup += tbody
+
+        for header in headers:
+            row = nodes.row()
+            tbody += row
+
+            for _, _, k in self.columns:
+                entry = nodes.entry()
+                row += entry
+                entry += nodes.paragraph(text=header.get(k, 'N/A'))
+
+        result.append(table)
+
+        return result
+
+
+class PfmDirective(Directive):
+    """
+    Directive to render a preferences manifest plist as a table.
+
+    Example::
+
+        .. pfm:: test.manifest
+           :key: subkey.subsubkey
+           :include_common:
+
+        For very large manifests, HTML output can load the rows from a compressed JSON file on demand instead.
+        Other builders render the usual table.
+
+        .. pfm:: test.manifest
+           :render: lazy
+    """
+    has_content = False
+    required_arguments = 1
+    optional_arguments = 0
+    final_argument_whitespace = True
+    option_spec = {
+        'key': lambda v: [k for k in v.split(':')],
+        'include_common': directives.flag,
+        'render': lambda v: directives.choice(v, ('static', 'lazy'))
+    }
+    common_keys = ('PayloadDescription', 'PayloadDisplayName', 'PayloadIdentifier', 'PayloadType', 'PayloadUUID',
+                   'PayloadVersion', 'PayloadOrganization')
+
+    subkey_keys = ('pfm_name', 'pfm_type', 'pfm_title', 'pfm_description', 'pfm_require')
+
+    def row_data(self, dicts):
+        """
+        Generate the cell values of documentation table rows for a collection of keys
+        Yields a list of values, one for each of `subkey_keys`
+
+        :param data: dict item from pfm_subkeys
+        :return:
+        """
+        for d in dicts:
+            if d['pfm_name'] in self.common_keys:
+                continue
+
+            yield [d.get(sk, 'n/a') for sk in self.subkey_keys]
+
+    def rows(self, dicts):
+        """
+        Generate documentation table rows for a collection of keys
+        Yields a docutils row node
+
+        :param data: dict item from pfm_subkeys
+        :return:
+        """
+        for values in self.row_data(dicts):
+            row = nodes.row()
+
+            for value in values:
+                entry = nodes.entry()
+                row += entry
+                entry += nodes.paragraph(text=value)
+
+            yield row
+
+    def find_subkey_path(self, d, keys):
+        for curkey in d.get('pfm_subkeys', []):
+            if 'pfm_name' not in curkey:
+                continue
+
+            if curkey.get('pfm_name') == keys[0]:
+                if len(keys) == 1:
+                    return curkey
+                else:
+                    return self.find_subkey_path(curkey, keys[1:])
+
+        return None
+
+    def run(self):
+        warning = self.state.document.reporter.warning
+        env = self.state.document.settings.env
+        fn = search_image_for_language(self.arguments[0], env)
+        relfn, absfn = env.relfn2path(fn)
+        env.note_dependency(relfn)
+        try:
+            pfmanifestdata = read_plist(absfn)
+        except IOError as err:
+            return [warning('Preference Manifest file "%s" cannot be read: %s'
+                            % (fn, err), line=self.lineno)]
+
+        table = nodes.table()
+        header = ('Name', 'Type', 'Title', 'Description', 'Required')
+
+        tgroup = nodes.tgroup(cols=len(header))
+        table += tgroup
+
+        colwidths = (1, 1, 1, 3, 1)
+        for colwidth in colwidths:
+            tgroup += nodes.colspec(colwidth=colwidth)
+
+        thead = nodes.thead()
+        tgroup += thead
+
+        th_row = nodes.row()
+        thead += th_row
+
+        for head in header:
+            entry = nodes.entry()
+            th_row += entry
+            entry += nodes.paragraph(text=head)
+
+        tbody = nodes.tbody()
+        tgroup += tbody
+
+        if len(self.options.get('key', [])) > 0:
+            pfmanifestdata = self.find_subkey_path(pfmanifestdata, self.options['key'])
+            if pfmanifestdata is None:
+                raise self.severe("Could not locate the manifest key specified by: {}".format(self.options['key']))
+
+        rows = [row for row in self.rows(pfmanifestdata.get('pfm_subkeys'))]
+        tbody += rows
+        #tbody = nodes.tbody('', *rows)
+
+        if self.options.get('render') == 'lazy':
+            lazy = pfm_lazy_table(header=header, rows=list(self.row_data(pfmanifestdata.get('pfm_subkeys'))))
+            lazy += table
+            return [lazy]
+
+        return [table]
+
+
+class PfmProfileDirective(Directive):
+    """
+    Directive to render the settings of an unsigned configuration profile alongside the manifests describing them.
+
+    Each entry of ``PayloadContent`` is rendered as a section. The manifest for its ``PayloadType`` is found by
+    ``pfm_domain`` in the manifests directory, and every setting in the payload is looked up by key path in that
+    manifest.
+
+    Example::
+
+        .. pfmprofile:: profiles/wifi.mobileconfig
+           :manifests: manifests
+           :pattern: com.apple.*.plist
+    """
+    has_content = False
+    required_arguments = 1
+    final_argument_whitespace = True
+    option_spec = {
+        'manifests': directives.unchanged_required,
+        'pattern': directives.unchanged,
+        'include_common': directives.flag
+    }
+
+    def settings(self, payload, prefix=()):
+        """
+        Flatten the settings of a payload into key paths.
+        Yields a tuple of (path, value) for every setting that is not itself a dictionary.
+
+        :param payload: dict item from PayloadContent
+        :return:
+        """
+        for k, v in sorted(payload.items()):
+            if not prefix and k in PfmDirective.common_keys and 'include_common' not in self.options:
+                continue
+
+            path = prefix + (k,)
+            if isinstance(v, dict):
+                for setting in self.settings(v, path):
+                    yield setting
+            else:
+                yield path, v
+
+    def build_settings_table(self, payload, index):
+        """
+        Build a table of the settings in a payload, next to the manifest definition of each key.
+
+        :param payload: dict item from PayloadContent
+        :param index: path index of the payload's manifest, from `index_subkeys`
+        :return: nodes.table
+        """
+        table = nodes.table()
+        header = ('Key', 'Value', 'Default', 'Title', 'Description')
+
+        tgroup = nodes.tgroup(cols=len(header))
+        table += tgroup
+
+        colwidths = (1, 1, 1, 1, 3)
+        for colwidth in colwidths:
+            tgroup += nodes.colspec(colwidth=colwidth)
+
+        thead = nodes.thead()
+        tgroup += thead
+
+        th_row = nodes.row()
+        thead += th_row
+
+        for head in header:
+            entry = nodes.entry()
+            th_row += entry
+            entry += nodes.paragraph(text=head)
+
+        tbody = nodes.tbody()
+        tgroup += tbody
+
+        for path, value in self.settings(payload):
+            kd = index.get(path, {})
+            values = (':'.join(path), format_value(value), format_value(kd.get('pfm_default', 'N/A')),
+                      kd.get('pfm_title', 'N/A'), kd.get('pfm_description', 'N/A'))
+
+            row = nodes.row()
+            tbody += row
+
+            for value in values:
+                entry = nodes.entry()
+                row += entry
+                entry += nodes.paragraph(text=value)
+
+        return table
+
+    def run(self):
+        warning = self.state.document.reporter.warning
+        env = self.state.document.settings.env
+        fn = search_image_for_language(self.arguments[0], env)
+        relfn, absfn = env.relfn2path(fn)
+        env.note_dependency(relfn)
+        try:
+            profile = read_plist(absfn)
+        except IOError as err:
+            return [warning('Configuration profile "%s" cannot be read: %s'
+                            % (fn, err), line=self.lineno)]
+        except PLIST_ERRORS as err:
+            return [warning('Configuration profile "%s" is not an unsigned profile: %s'
+                            % (fn, err), line=self.lineno)]
+
+        if 'manifests' not in self.options:
+            raise self.error('The manifests directory must be given with the :manifests: option.')
+
+        reldir, absdir = env.relfn2path(self.options['manifests'])
+        pattern = self.options.get('pattern', '*.plist')
+
+        # The pfm_domain of every manifest decides which one documents a payload, so all of them are dependencies,
+        # and the directory listing is checked by `get_outdated_listings` for manifests added or removed.
+        try:
+            manifests = scan_manifest_headers(env, absdir, pattern, PfmIndexDirective.header_keys)
+        except (IOError, OSError) as err:
+            note_directory_listing(env, absdir, pattern, None)
+            return [warning('Preference Manifest directory "%s" cannot be read: %s'
+                            % (self.options['manifests'], err), line=self.lineno)]
+
+        note_directory_listing(env, absdir, pattern, [filename for filename, _ in manifests])
+
+        domains = {}
+        result = []
+        for filename, header in manifests:
+            env.note_dependency(os.path.join(reldir, filename))
+            if isinstance(header, Exception):
+                result.append(warning('Preference Manifest file "%s" cannot be read: %s'
+                                      % (filename, header), line=self.lineno))
+            elif 'pfm_domain' in header:
+                domains.setdefault(header['pfm_domain'], filename)
+
+        # Each manifest is read and indexed once, however many payloads of that type the profile contains.
+        indexes = {}
+
+        for payload in profile.get('PayloadContent', []):
+            payload_type = payload.get('PayloadType', 'N/A')
+
+            if payload_type not in indexes:
+                indexes[payload_type] = {}
+                if payload_type not in domains:
+                    result.append(warning('No Preference Manifest with pfm_domain "%s" exists in "%s".'
+                                          % (payload_type, self.options['manifests']), line=self.lineno))
+                else:
+                    try:
+                        data = read_plist(os.path.join(absdir, domains[payload_type]))
+                    except (IOError,) + PLIST_ERRORS as err:
+                        result.append(warning('Preference Manifest file "%s" cannot be read: %s'
+                                              % (domains[payload_type], err), line=self.lineno))
+                    else:
+                        indexes[payload_type] = index_subkeys(data)
+
+            targetid = "{0}-{1}".format(payload_type, payload.get('PayloadUUID', 'auto'))
+            section = nodes.section(ids=[targetid])
+            section += nodes.title(text=payload.get('PayloadDisplayName', payload_type))
+            section += nodes.paragraph(text=payload_type)
+            if 'PayloadDescription' in payload:
+                section += nodes.paragraph(text=payload['PayloadDescription'])
+            section += self.build_settings_table(payload, indexes[payload_type])
+
+            result.append(section)
+
+        return result
+
+
+#: Builders that replace lazy tables with a shell loading the rows on demand.
+LAZY_TABLE_BUILDERS = ('html', 'dirhtml', 'singlehtml')
+
+
+class pfm_lazy_table(nodes.General, nodes.Element):
+    """
+    Wraps a static table along with its row data, so that html builders can replace it with a shell that loads the
+    rows on demand. Other builders keep the static table.
+    """
+    pass
+
+
+def write_lazy_table(app, node, docname):
+    """
+    Write the row data of a lazy table to JSON sidecars and return the HTML shell that loads it.
+
+    The rows are written both gzipped and uncompressed, for browsers without ``DecompressionStream``. Sidecars are
+    named after a digest of their content, so unchanged tables keep the same URL between builds.
+
+    :return: nodes.raw
+    """
+    data = json.dumps({'header': node['header'], 'rows': node['rows']}, default=str).encode('utf-8')
+    filename = '{0}.json'.format(hashlib.sha1(data).hexdigest())
+    outdir = os.path.join(app.builder.outdir, '_static', 'pfm')
+    if not os.path.isdir(outdir):
+        os.makedirs(outdir)
+
+    outfn = os.path.join(outdir, filename)
+    if not os.path.exists(outfn + '.gz'):
+        f = gzip.open(outfn + '.gz', 'wb')
+        try:
+            f.write(data)
+        finally:
+            f.close()
+
+    if not os.path.exists(outfn):
+        f = open(outfn, 'wb')
+        try:
+            f.write(data)
+        finally:
+            f.close()
+
+    src = relative_uri(app.builder.get_target_uri(docname), '_static/pfm/' + filename)
+    html = ('<div class="pfm-lazy" data-src="{0}">'
+            '<input class="pfm-lazy-filter" type="search" placeholder="Filter keys">'
+            '<div class="pfm-lazy-viewport"></div>'
+            '<noscript>This table requires JavaScript.</noscript>'
+            '</div>').format(escape(src, quote=True))
+
+    return nodes.raw('', html, format='html')
+
+
+def process_lazy_tables(app, doctree, docname):
+    # Only builders that produce pages for a browser get the shell. epub shares the html format, but e-readers
+    # do not fetch the sidecar, so it keeps the static table like every other builder.
+    for node in doctree.traverse(pfm_lazy_table):
+        if app.builder.name in LAZY_TABLE_BUILDERS:
+            node.replace_self(write_lazy_table(app, node, docname))
+        else:
+            node.replace_self(node.children)
+
+
+def add_static_path(app):
+    if app.builder.format == 'html':
+        app.config.html_static_path.append(os.path.join(os.path.dirname(__file__), 'static'))
+
+
+def note_directory_listing(env, dirname, pattern, filenames):
+    """
+    Record the manifests a document listed from a directory, so that it is read again when that listing changes.
+
+    :param dirname: absolute path of the directory
+    :param pattern: fnmatch pattern selecting manifest file names
+    :param filenames: sorted manifest file names, or None if the directory could not be read
+    """
+    if not hasattr(env, 'pfm_directory_listings'):
+        env.pfm_directory_listings = {}
+
+    env.pfm_directory_listings.setdefault(env.docname, []).append((dirname, pattern, filenames))
+
+
+def get_outdated_listings(app, env, added, changed, removed):
+    """
+    Find the documents whose manifest directories have gained or lost manifests since they were read.
+    """
+    outdated = []
+
+    for docname, listings in getattr(env, 'pfm_directory_listings', {}).items():
+        if docname in removed:
+            continue
+
+        for dirname, pattern, filenames in listings:
+            try:
+                current = list_manifests(dirname, pattern)
+            except OSError:
+                current = None
+
+            if current != filenames:
+                outdated.append(docname)
+                break
+
+    return outdated
+
+
+def purge_directory_listings(app, env, docname):
+    getattr(env, 'pfm_directory_listings', {}).pop(docname, None)
+
+
+def prune_header_cache(app, env):
+    """
+    Forget the manifest summaries of directories that no document lists any more.
+    """
+    dirnames = set(dirname for listings in getattr(env, 'pfm_directory_listings', {}).values()
+                   for dirname, _, _ in listings)
+    cache = getattr(env, 'pfm_header_cache', {})
+
+    for absfn in [k for k in cache if os.path.dirname(k) not in dirnames]:
+        del cache[absfn]
+
+
+def merge_header_cache(app, env, docnames, other):
+    """
+    Keep the manifest summaries and directory listings read by parallel reader processes.
+    """
+    if not hasattr(env, 'pfm_header_cache'):
+        env.pfm_header_cache = {}
+    if not hasattr(env, 'pfm_directory_listings'):
+        env.pfm_directory_listings = {}
+
+    env.pfm_header_cache.update(getattr(other, 'pfm_header_cache', {}))
+
+    listings = getattr(other, 'pfm_directory_listings', {})
+    for docname in docnames:
+        if docname in listings:
+            env.pfm_directory_listings[docname] = listings[docname]
+
+
+def setup(app):
+    app.add_directive('pfm', PfmDirective)
+    app.add_directive('pfmheader', PfmHeaderDirective)
+    app.add_directive('pfmkey', PfmKeyDirective)
+    app.add_directive('pfmindex', PfmIndexDirective)
+    app.add_directive('pfmprofile', PfmProfileDirective)
+    # add_js_file and add_css_file replaced add_javascript and add_stylesheet in Sphinx 1.8, which removed the old
+    # names in Sphinx 4.
+    (app.add_js_file if hasattr(app, 'add_js_file') else app.add_javascript)('pfmanifest.js')
+    (app.add_css_file if hasattr(app, 'add_css_file') else app.add_stylesheet)('pfmanifest.css')
+    app.connect('builder-inited', add_static_path)
+    app.connect('doctree-resolved', process_lazy_tables)
+    app.connect('env-merge-info', merge_header_cache)
+    app.connect('env-get-outdated', get_outdated_listings)
+    app.connect('env-purge-doc', purge_directory_listings)
+    app.connect('env-updated', prune_header_cache)
+
+    return {'version': '0.1'}
\ No newline at end of file
@@ -0,0 +1,491 @@
+# -*- coding: utf-8 -*-
+"""
+    sphinxcontrib.pfmanifest.index
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Read and index apple preference manifests by key path.
+
+    Nothing in this module depends on docutils or sphinx, so that the command line tool can use it without
+    importing either.
+
+    :license: MIT
+"""
+
+import fnmatch
+import json
+import os
+import os.path
+import plistlib
+import re
+import tempfile
+from collections import OrderedDict
+from xml.parsers.expat import ExpatError
+
+#: Top level manifest keys rendered by the pfmheader directive.
+HEADER_KEYS = ('pfm_domain', 'pfm_supervised', 'pfm_macos_min', 'pfm_macos_max', 'pfm_ios_min', 'pfm_ios_max',
+               'pfm_unique')
+
+#: Top level manifest keys kept when summarising a manifest for pfmindex and the persisted index.
+SUMMARY_KEYS = HEADER_KEYS + ('pfm_title',)
+
+#: Key specification fields rendered by the pfmkey directive, as (manifest key, heading) pairs.
+SPEC_FIELDS = (('pfm_type', 'Type'), ('pfm_default', 'Default'), ('pfm_require', 'Required'),
+               ('pfm_format', 'Regex'), ('pfm_ios_min', 'iOS'), ('pfm_macos_min', 'macOS'),
+               ('pfm_supervised', 'Supervised'))
+
+#: Every key field kept in a persisted manifest index.
+KEY_FIELDS = ('pfm_name', 'pfm_title', 'pfm_description') + tuple(k for k, _ in SPEC_FIELDS) + ('pfm_range_list',)
+
+INDEX_VERSION = 1
+
+#: Raised when a file is not a valid plist. Python 3 raises ``plistlib.InvalidFileException``, a ValueError, for
+#: files that are neither XML nor binary plists, and ExpatError for malformed XML.
+PLIST_ERRORS = (ExpatError, ValueError)
+
+
+def read_plist(path):
+    """
+    Read a plist file, with ``plistlib.load`` where it exists and ``plistlib.readPlist`` on Python 2.
+
+    :raises IOError: if the file cannot be read
+    :raises PLIST_ERRORS: if the file is not a plist
+    """
+    if hasattr(plistlib, 'load'):
+        with open(path, 'rb') as f:
+            return plistlib.load(f)
+
+    return plistlib.readPlist(path)
+
+
+def format_value(value, nested=False):
+    """
+    Format a plist value as readable text.
+
+    ``<data>`` values are summarised by their size rather than printed, since they are often whole files such as
+    fonts or certificates. Lists are comma separated, and dictionaries are listed as ``{key: value, ...}``.
+
+    :param value: value read from a plist
+    :param nested: whether the value is inside a list or dictionary, which brackets nested lists
+    :return: str
+    """
+    if isinstance(value, dict):
+        return u'{' + u', '.join(u'{0}: {1}'.format(k, format_value(v, True))
+                                 for k, v in sorted(value.items())) + u'}'
+
+    if isinstance(value, list):
+        text = u', '.join(format_value(v, True) for v in value)
+        return u'[' + text + u']' if nested else text
+
+    if isinstance(value, getattr(plistlib, 'Data', ())):  # Python 2 and Python 3 before 3.9
+        value = value.data
+
+    # On Python 2 bytes is str, which readPlist only uses for strings.
+    if isinstance(value, bytes) and not isinstance(value, str):
+        return u'<data, {0} bytes>'.format(len(value))
+
+    return u'{0}'.format(value)
+
+
+def normalise_value(value):
+    """
+    Convert a plist value to the nearest value JSON can represent.
+
+    Dictionaries and lists are converted item by item, and values JSON has no type for, such as ``<data>`` and
+    ``<date>``, are formatted with `format_value`.
+
+    :return: dict, list, str, int, float, bool or None
+    """
+    if isinstance(value, dict):
+        return dict((k, normalise_value(v)) for k, v in value.items())
+
+    if isinstance(value, list):
+        return [normalise_value(v) for v in value]
+
+    if value is None or isinstance(value, (bool, int, float)) or isinstance(value, type(u'')):
+        return value
+
+    if isinstance(value, str) and bytes is str:  # Python 2 strings
+        return value
+
+    return format_value(value)
+
+
+def version_tuple(version):
+    """
+    Convert a version such as ``10.13`` or ``9`` to a tuple of ints, so that versions compare numerically.
+
+    :param version: version string or number
+    :return: tuple of int
+    """
+    return tuple(int(part) for part in re.findall(r'\d+', u'{0}'.format(version)))
+
+
+def index_subkeys(data, prefix=()):
+    """
+    Build a path index of every named key in a manifest.
+
+    Paths are tuples of ``pfm_name`` values, listed in document order. Where the same path occurs more than once,
+    only the first occurrence is indexed, which matches the key that a nested ``pfm_subkeys`` search would find.
+
+    :param data: manifest or key dict containing pfm_subkeys
+    :return: OrderedDict of path tuple to key dict
+    """
+    index = OrderedDict()
+
+    def walk(d, prefix):
+        for curkey in d.get('pfm_subkeys', []):
+            if 'pfm_name' not in curkey:
+                continue
+
+            path = prefix + (curkey['pfm_name'],)
+            if path in index:
+                continue
+
+            index[path] = curkey
+            walk(curkey, path)
+
+    walk(data, tuple(prefix))
+
+    return index
+
+
+def compile_key_pattern(pattern):
+    """
+    Compile a colon separated key path pattern into a regular expression.
+
+    Within a path segment ``*`` matches any run of characters and ``?`` matches a single character. A leading or
+    inner ``**`` segment matches any number of whole segments, including none, while a trailing ``**`` matches one
+    or more, so ``EAPClientConfiguration:**`` matches every descendant of ``EAPClientConfiguration`` but not the key
+    itself.
+
+    :param pattern: key path pattern, eg. ``EAPClientConfiguration:*`` or ``**:Password*``
+    :return: compiled regular expression matching colon joined key paths
+    """
+    segments = pattern.split(':')
+    regex = []
+
+    for i, segment in enumerate(segments):
+        last = i == len(segments) - 1
+        if segment == '**':
+            regex.append('.*' if last else '(?:[^:]+:)*')
+            continue
+
+        for char in segment:
+            if char == '*':
+                regex.append('[^:]*')
+            elif char == '?':
+                regex.append('[^:]')
+            else:
+                regex.append(re.escape(char))
+
+        if not last:
+            regex.append(':')
+
+    return re.compile(''.join(regex) + r'\Z')
+
+
+def match_subkey_paths(index, pattern):
+    """
+    Find the keys of a path index that match a key path or pattern.
+
+    :param index: path index from `index_subkeys`
+    :param pattern: key path, optionally containing wildcards
+    :return: list of (path, key dict) tuples in document order
+    """
+    if '*' not in pattern and '?' not in pattern:
+        path = tuple(pattern.split(':'))
+        return [(path, index[path])] if path in index else []
+
+    regex = compile_key_pattern(pattern)
+
+    return [(p, kd) for p, kd in index.items() if regex.match(':'.join(p))]
+
+
+def split_key_patterns(text):
+    """
+    Split a comma separated list of key paths or patterns, ignoring whitespace around the commas.
+
+    :return: list of str
+    """
+    return [p.strip() for p in text.split(',') if p.strip()]
+
+
+def match_subkey_patterns(index, patterns):
+    """
+    Find the keys of a path index that match any of several key paths or patterns.
+
+    Keys are listed in the order of the patterns that first matched them, and each key is listed only once.
+
+    :param index: path index from `index_subkeys`
+    :param patterns: list of key paths, optionally containing wildcards
+    :return: tuple of (list of (path, key dict) tuples, list of patterns that matched nothing)
+    """
+    matches = []
+    unmatched = []
+    seen = set()
+
+    for pattern in patterns:
+        found = match_subkey_paths(index, pattern)
+        if not found:
+            unmatched.append(pattern)
+
+        for path, kd in found:
+            if path not in seen:
+                seen.add(path)
+                matches.append((path, kd))
+
+    return matches, unmatched
+
+
+def manifest_header(data, keys):
+    """
+    Reduce a manifest to its top level values.
+
+    :param data: the manifest
+    :param keys: top level keys to retain
+    :return: dict of the retained keys, plus the number of top level ``pfm_subkeys`` as ``key_count``
+    """
+    header = dict((k, data[k]) for k in keys if k in data)
+    header['key_count'] = len(data.get('pfm_subkeys', []))
+
+    return header
+
+
+def read_manifest_header(absfn, keys):
+    """
+    Read the top level values of a manifest, discarding everything else.
+
+    Only the requested keys are kept, along with the number of top level ``pfm_subkeys``, so that a cached
+    summary stays small no matter how large the manifest is.
+
+    :param absfn: absolute path to the manifest plist
+    :param keys: top level keys to retain
+    :return: dict
+    """
+    return manifest_header(read_plist(absfn), keys)
+
+
+def list_manifests(dirname, pattern):
+    """
+    :param dirname: directory containing the manifests
+    :param pattern: fnmatch pattern selecting manifest file names
+    :return: sorted list of the manifest file names in `dirname`
+    """
+    return sorted(fnmatch.filter(os.listdir(dirname), pattern))
+
+
+def scan_manifest_headers(env, dirname, pattern, keys):
+    """
+    Summarise every manifest in a directory, re-reading only the files that changed since the last scan.
+
+    Summaries are cached on the build environment against each file's mtime, so the cache survives between
+    incremental builds and an unchanged manifest is never parsed twice. Cached summaries of files that are no longer
+    in the directory are dropped.
+
+    :param env: sphinx build environment
+    :param dirname: absolute path of the directory to scan
+    :param pattern: fnmatch pattern selecting manifest file names
+    :param keys: top level keys to retain for each manifest
+    :return: list of (filename, header dict or the exception raised reading it) tuples sorted by filename
+    """
+    if not hasattr(env, 'pfm_header_cache'):
+        env.pfm_header_cache = {}
+
+    cache = env.pfm_header_cache
+    results = []
+    listing = os.listdir(dirname)
+
+    present = set(os.path.join(dirname, filename) for filename in listing)
+    for absfn in [k for k in cache if os.path.dirname(k) == dirname and k not in present]:
+        del cache[absfn]
+
+    for filename in sorted(fnmatch.filter(listing, pattern)):
+        absfn = os.path.join(dirname, filename)
+        mtime = os.path.getmtime(absfn)
+        cached = cache.get(absfn)
+
+        if cached is None or cached[0] != mtime or cached[1] != keys:
+            try:
+                header = read_manifest_header(absfn, keys)
+            except (IOError,) + PLIST_ERRORS as err:
+                results.append((filename, err))
+                continue
+            cached = cache[absfn] = (mtime, keys, header)
+
+        results.append((filename, cached[2]))
+
+    return results
+
+
+class ManifestIndex(object):
+    """
+    A persisted index of every manifest in a directory, holding the header and key fields of each manifest.
+
+    The index is stored as JSON. Loading it re-reads only the manifests whose mtime changed since it was saved,
+    so repeated queries do not parse any manifest plist at all.
+
+    Example::
+
+        index = ManifestIndex.load('manifests')
+        for path, fields in index.lookup('com.apple.wifi.managed', 'EAPClientConfiguration:*'):
+            print(':'.join(path), fields.get('pfm_type'))
+    """
+
+    def __init__(self, dirname, manifests=None):
+        self.dirname = dirname
+        self.manifests = manifests or {}
+        self.errors = []
+        self.save_error = None
+        self._domains = None
+        self._keys = {}
+
+    @classmethod
+    def load(cls, dirname, path=None, pattern='*.plist'):
+        """
+        Load the index of a manifest directory, refreshing and saving it if any manifest has changed.
+
+        If the refreshed index cannot be saved, it is still returned and the error is kept in `save_error`.
+
+        :param dirname: directory containing the manifests
+        :param path: index file, defaults to ``.pfmindex.json`` inside `dirname`
+        :param pattern: fnmatch pattern selecting manifest file names
+        :return: ManifestIndex
+        """
+        if path is None:
+            path = os.path.join(dirname, '.pfmindex.json')
+
+        # An index that cannot be read, or is not in the expected form, is rebuilt from scratch.
+        manifests = {}
+        try:
+            with open(path) as f:
+                stored = json.load(f)
+            if isinstance(stored, dict) and stored.get('version') == INDEX_VERSION \
+                    and stored.get('pattern') == pattern:
+                manifests = dict((filename, entry) for filename, entry in stored['manifests'].items()
+                                 if isinstance(entry['mtime'], (int, float)) and isinstance(entry['header'], dict)
+                                 and all(isinstance(p, list) and isinstance(f, dict) for p, f in entry['keys']))
+        except (IOError, ValueError, KeyError, TypeError, AttributeError):
+            manifests = {}
+
+        index = cls(dirname, manifests)
+        if index.refresh(pattern):
+            try:
+                index.save(path, pattern)
+            except (IOError, OSError) as err:
+                index.save_error = err
+
+        return index
+
+    def refresh(self, pattern='*.plist'):
+        """
+        Re-read the manifests that were added or changed, and forget those that were removed.
+
+        :return: True if the index changed
+        """
+        changed = False
+        filenames = set(fnmatch.filter(os.listdir(self.dirname), pattern))
+
+        for filename in set(self.manifests) - filenames:
+            del self.manifests[filename]
+            changed = True
+
+        for filename in sorted(filenames):
+            absfn = os.path.join(self.dirname, filename)
+            mtime = os.path.getmtime(absfn)
+            if filename in self.manifests and self.manifests[filename]['mtime'] == mtime:
+                continue
+
+            try:
+                data = read_plist(absfn)
+            except (IOError,) + PLIST_ERRORS as err:
+                self.errors.append((filename, err))
+                if self.manifests.pop(filename, None) is not None:
+                    changed = True
+                continue
+
+            # Values are stored as they will be read back from JSON, so that queries answered before and after
+            # the index is saved agree.
+            self.manifests[filename] = {
+                'mtime': mtime,
+                'header': normalise_value(manifest_header(data, SUMMARY_KEYS)),
+                'keys': [[list(p), normalise_value(dict((k, kd[k]) for k in KEY_FIELDS if k in kd))]
+                         for p, kd in index_subkeys(data).items()],
+            }
+            changed = True
+
+        if changed:
+            self._domains = None
+            self._keys = {}
+
+        return changed
+
+    def save(self, path, pattern='*.plist'):
+        """
+        Write the index to `path`, replacing any previous index only once it has been written completely.
+        """
+        fd, tmpfn = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            # mkstemp creates the file readable only by its owner, but the index is shared like the manifests.
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmpfn, 0o666 & ~umask)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': INDEX_VERSION, 'pattern': pattern, 'manifests': self.manifests}, f,
+                          default=str)
+            os.rename(tmpfn, path)
+        except (IOError, OSError):
+            os.unlink(tmpfn)
+            raise
+
+    def domains(self):
+        """
+        :return: dict of pfm_domain to manifest filename
+        """
+        if self._domains is None:
+            self._domains = {}
+            for filename in sorted(self.manifests):
+                domain = self.manifests[filename]['header'].get('pfm_domain')
+                if domain is not None:
+                    self._domains.setdefault(domain, filename)
+
+        return self._domains
+
+    def keys(self, domain):
+        """
+        :return: path index of the manifest for `domain`, in the same form as `index_subkeys`
+        """
+        filename = self.domains()[domain]
+        if filename not in self._keys:
+            self._keys[filename] = OrderedDict((tuple(p), fields) for p, fields in self.manifests[filename]['keys'])
+
+        return self._keys[filename]
+
+    def lookup(self, domain, pattern):
+        """
+        Find the keys of a manifest matching a key path or pattern, as accepted by the pfmkey directive.
+
+        :raises KeyError: if no manifest has the pfm_domain `domain`
+        :return: list of (path, fields) tuples in document order
+        """
+        matches, _ = match_subkey_patterns(self.keys(domain), split_key_patterns(pattern))
+
+        return matches
+
+    def grep(self, regex, domain=None):
+        """
+        Search the name, title and description of every key.
+
+        :param regex: compiled regular expression
+        :param domain: only search the manifest for this pfm_domain
+        :return: list of (domain, path, fields) tuples
+        """
+        domains = [domain] if domain is not None else sorted(self.domains())
+        matches = []
+        for d in domains:
+            for p, fields in self.keys(d).items():
+                for k in ('pfm_name', 'pfm_title', 'pfm_description'):
+                    if regex.search(u'{0}'.format(fields.get(k, ''))):
+                        matches.append((d, p, fields))
+                        break
+
+        return matches
@@ -0,0 +1,135 @@
+/*
+ * pfmanifest.js
+ * ~~~~~~~~~~~~~
+ *
+ * Renders the rows of lazily loaded preference manifest tables (.. pfm:: with :render: lazy).
+ * Row data is fetched from a JSON sidecar, filtered on the client, and only the rows
+ * that are scrolled into view are added to the page.
+ *
+ * :license: MIT
+ */
+
+(function () {
+  'use strict';
+
+  var OVERSCAN = 10;
+
+  function load(src) {
+    // The gzipped sidecar is only useful where the browser can decompress it; otherwise fetch the plain copy.
+    var compressed = typeof DecompressionStream !== 'undefined';
+
+    return fetch(compressed ? src + '.gz' : src).then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.status + ' ' + response.statusText);
+      }
+      // A server may already have decoded the sidecar for us if it sent Content-Encoding: gzip.
+      if (!compressed || response.headers.get('Content-Encoding') === 'gzip') {
+        return response.json();
+      }
+      var stream = response.body.pipeThrough(new DecompressionStream('gzip'));
+      return new Response(stream).json();
+    });
+  }
+
+  function cell(tag, text) {
+    var el = document.createElement(tag);
+    el.textContent = text === null || text === undefined ? '' : String(text);
+    el.title = el.textContent;
+    return el;
+  }
+
+  function LazyTable(container, data) {
+    this.data = data;
+    this.matches = data.rows;
+    this.rowHeight = 0;
+    this.viewport = container.querySelector('.pfm-lazy-viewport');
+    this.filter = container.querySelector('.pfm-lazy-filter');
+
+    this.spacer = document.createElement('div');
+    this.spacer.className = 'pfm-lazy-spacer';
+
+    this.table = document.createElement('table');
+    this.table.className = 'docutils pfm-lazy-table';
+    this.thead = document.createElement('thead');
+    var tr = document.createElement('tr');
+    data.header.forEach(function (head) {
+      tr.appendChild(cell('th', head));
+    });
+    this.thead.appendChild(tr);
+    this.table.appendChild(this.thead);
+    this.tbody = document.createElement('tbody');
+    this.table.appendChild(this.tbody);
+
+    this.spacer.appendChild(this.table);
+    this.viewport.appendChild(this.spacer);
+
+    this.viewport.addEventListener('scroll', this.render.bind(this));
+    this.filter.addEventListener('input', this.applyFilter.bind(this));
+    this.applyFilter();
+  }
+
+  LazyTable.prototype.applyFilter = function () {
+    var needle = this.filter.value.toLowerCase();
+    this.matches = needle ? this.data.rows.filter(function (row) {
+      return row.some(function (value) {
+        return String(value).toLowerCase().indexOf(needle) !== -1;
+      });
+    }) : this.data.rows;
+    this.viewport.scrollTop = 0;
+    this.render();
+  };
+
+  LazyTable.prototype.render = function () {
+    // Rows are clamped to one line by pfmanifest.css, but the theme decides how tall that line is, so the row
+    // height is measured from the first row rendered rather than assumed.
+    var rowHeight = this.rowHeight || 32;
+    var first = Math.max(0, Math.floor(this.viewport.scrollTop / rowHeight) - OVERSCAN);
+    var last = Math.min(this.matches.length,
+                        Math.ceil((this.viewport.scrollTop + this.viewport.clientHeight) / rowHeight) + OVERSCAN);
+    var fragment = document.createDocumentFragment();
+
+    for (var i = first; i < last; i++) {
+      var tr = document.createElement('tr');
+      this.matches[i].forEach(function (value) {
+        tr.appendChild(cell('td', value));
+      });
+      fragment.appendChild(tr);
+    }
+
+    this.tbody.textContent = '';
+    this.tbody.appendChild(fragment);
+
+    // A table that is not displayed yet measures 0, so keep the estimate until a real height is available.
+    var measured = !this.rowHeight && this.tbody.rows.length ? this.tbody.rows[0].getBoundingClientRect().height : 0;
+    if (measured) {
+      this.rowHeight = measured;
+      this.render();
+      return;
+    }
+
+    this.table.style.top = first * rowHeight + 'px';
+    this.spacer.style.height = this.thead.getBoundingClientRect().height + this.matches.length * rowHeight + 'px';
+  };
+
+  function init() {
+    var containers = document.querySelectorAll('.pfm-lazy');
+    Array.prototype.forEach.call(containers, function (container) {
+      load(container.getAttribute('data-src')).then(function (data) {
+        new LazyTable(container, data);
+      }, function (err) {
+        var message = 'Preference Manifest table cannot be loaded: ' + err;
+        if (window.location.protocol === 'file:') {
+          message += '. Browsers do not allow pages opened from a file to load data; serve the documentation ' +
+                     'over HTTP instead, eg. with python -m http.server.';
+        }
+        container.querySelector('.pfm-lazy-viewport').textContent = message;
+      });
+    });
+  }
+
+  if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', init);
+  } else {
+    init();
+  }
+})();
@@ -0,0 +1,174 @@
+from __future__ import print_function
+import datetime
+import json
+import os
+import plistlib
+import stat
+import sys
+import tempfile
+import shutil
+
+from sphinxcontrib.pfmanifest.index import ManifestIndex
+from sphinxcontrib.pfmanifest.__main__ import main
+
+from nose.tools import *
+
+try:
+    from StringIO import StringIO
+except ImportError:  # Python 3
+    from io import StringIO
+
+
+_manifest = {
+    'pfm_domain': 'com.example.wifi',
+    'pfm_title': 'Wi-Fi',
+    'pfm_macos_min': '10.9',
+    'pfm_subkeys': [
+        {'pfm_name': 'SSID_STR', 'pfm_type': 'string', 'pfm_title': 'SSID'},
+        {'pfm_name': 'Password', 'pfm_type': 'string', 'pfm_title': 'Password'},
+        {'pfm_name': 'Issued', 'pfm_type': 'date', 'pfm_default': datetime.datetime(2017, 1, 2, 3, 4, 5)},
+        {'pfm_name': 'EAPClientConfiguration', 'pfm_type': 'dictionary', 'pfm_subkeys': [
+            {'pfm_name': 'UserPassword', 'pfm_type': 'string', 'pfm_description': 'The password for the account.'},
+            {'pfm_name': 'AcceptEAPTypes', 'pfm_type': 'array', 'pfm_range_list': [13, 17, 21]},
+        ]},
+    ]
+}
+
+
+def write_manifest(filename, data, mtime=None):
+    path = os.path.join(_tempdir, filename)
+    if hasattr(plistlib, 'dump'):
+        with open(path, 'wb') as f:
+            plistlib.dump(data, f)
+    else:  # Python 2
+        plistlib.writePlist(data, path)
+
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def setup():
+    global _tempdir
+    _tempdir = tempfile.mkdtemp()
+
+
+def teardown():
+    shutil.rmtree(_tempdir)
+
+
+def with_manifests(func):
+    def test():
+        for filename in os.listdir(_tempdir):
+            os.unlink(os.path.join(_tempdir, filename))
+        write_manifest('com.example.wifi.plist', _manifest)
+        func()
+
+    test.__name__ = func.__name__
+    return test
+
+
+def run(*argv):
+    stdout = sys.stdout
+    sys.stdout = StringIO()
+    try:
+        code = main(['-d', _tempdir] + list(argv))
+        return code, sys.stdout.getvalue()
+    finally:
+        sys.stdout = stdout
+
+
+@with_manifests
+def test_index_persisted():
+    index = ManifestIndex.load(_tempdir)
+    path = os.path.join(_tempdir, '.pfmindex.json')
+    assert_true(os.path.exists(path))
+    umask = os.umask(0)
+    os.umask(umask)
+    assert_equal(stat.S_IMODE(os.stat(path).st_mode), 0o666 & ~umask)
+    assert_equal(ManifestIndex.load(_tempdir).manifests, index.manifests)
+
+
+@with_manifests
+def test_index_cold_and_warm_agree():
+    cold = ManifestIndex.load(_tempdir).lookup('com.example.wifi', 'Issued')
+    warm = ManifestIndex.load(_tempdir).lookup('com.example.wifi', 'Issued')
+    assert_equal(cold, warm)
+    assert_equal(warm[0][1]['pfm_default'], u'2017-01-02 03:04:05')
+
+
+@with_manifests
+def test_index_mtime_change_rereads():
+    ManifestIndex.load(_tempdir)
+    changed = dict(_manifest, pfm_subkeys=_manifest['pfm_subkeys'] + [{'pfm_name': 'HIDDEN_NETWORK'}])
+    write_manifest('com.example.wifi.plist', changed, mtime=1000000000)
+    index = ManifestIndex.load(_tempdir)
+    assert_equal([p for p, _ in index.lookup('com.example.wifi', 'HIDDEN_NETWORK')], [('HIDDEN_NETWORK',)])
+
+
+@with_manifests
+def test_index_deleted_manifest_dropped():
+    write_manifest('com.example.other.plist', dict(_manifest, pfm_domain='com.example.other'))
+    assert_in('com.example.other', ManifestIndex.load(_tempdir).domains())
+    os.unlink(os.path.join(_tempdir, 'com.example.other.plist'))
+    index = ManifestIndex.load(_tempdir)
+    assert_not_in('com.example.other', index.domains())
+    assert_not_in('com.example.other.plist', index.manifests)
+
+
+@with_manifests
+def test_index_skips_invalid_plist():
+    with open(os.path.join(_tempdir, 'bad.plist'), 'w') as f:
+        f.write('not a plist')
+    index = ManifestIndex.load(_tempdir)
+    assert_equal([filename for filename, _ in index.errors], ['bad.plist'])
+    assert_in('com.example.wifi', index.domains())
+
+
+@with_manifests
+def test_index_malformed_rebuilt():
+    path = os.path.join(_tempdir, '.pfmindex.json')
+    for stored in ([], {'version': 1, 'pattern': '*.plist', 'manifests': []},
+                   {'version': 1, 'pattern': '*.plist', 'manifests': {'com.example.wifi.plist': {'header': {}}}}):
+        with open(path, 'w') as f:
+            json.dump(stored, f)
+        index = ManifestIndex.load(_tempdir)
+        assert_in('com.example.wifi', index.domains())
+
+    code, _ = run('lookup', 'com.example.wifi', 'SSID_STR')
+    assert_equal(code, 0)
+
+
+@with_manifests
+def test_index_unsaved():
+    index = ManifestIndex.load(_tempdir, os.path.join(_tempdir, 'missing', 'index.json'))
+    assert_is_not_none(index.save_error)
+    assert_in('com.example.wifi', index.domains())
+
+
+@with_manifests
+def test_cli_lookup_wildcards():
+    code, out = run('--json', 'lookup', 'com.example.wifi', 'SSID_STR, **:*Password')
+    assert_equal(code, 0)
+    assert_equal([k['path'] for k in json.loads(out)],
+                 [['SSID_STR'], ['Password'], ['EAPClientConfiguration', 'UserPassword']])
+
+
+@with_manifests
+def test_cli_grep():
+    code, out = run('grep', '-i', 'PASSWORD FOR')
+    assert_equal(code, 0)
+    assert_in('com.example.wifi EAPClientConfiguration:UserPassword', out)
+
+
+@with_manifests
+def test_cli_dump():
+    code, out = run('dump', 'com.example.wifi')
+    assert_equal(code, 0)
+    assert_in('Valid Choices: 13, 17, 21', out)
+
+
+@with_manifests
+def test_cli_unknown_domain():
+    with assert_raises(SystemExit) as cm:
+        run('dump', 'com.example.missing')
+    assert_equal(cm.exception.code, 1)
@@ -25,6 +25,14 @@ def setup():
         os.path.join(_fixturedir, 'com.apple.fontmanifest.plist'),
         os.path.join(_srcdir, 'com.apple.fontmanifest.plist')
     )
+    shutil.copyfile(
+        os.path.join(_fixturedir, 'com.example.small.plist'),
+        os.path.join(_srcdir, 'com.example.small.plist')
+    )
+    shutil.copyfile(
+        os.path.join(_fixturedir, 'font.mobileconfig'),
+        os.path.join(_srcdir, 'font.mobileconfig')
+    )
 
 
 def teardown():
@@ -78,3 +86,117 @@ def test_buildhtml_manifest_font():
     """
     content = readfile('index.html')
     print(content)
+
+
+@with_runsphinx('html')
+def test_buildhtml_pfmindex():
+    """Generate a summary table of every manifest in the source directory.
+
+    .. pfmindex:: .
+       :sort: keys
+    """
+    content = readfile('index.html')
+    assert_in(b'pfmindex', content)
+    assert_less(content.index(b'com.example.small'), content.index(b'com.apple.font'))
+
+
+def test_buildhtml_pfmindex_added_manifest():
+    """Rebuild the manifest summary table incrementally when a manifest is added to the directory."""
+    src = '.. pfmindex:: .\n   :pattern: com.apple.*.plist\n'
+    added = os.path.join(_srcdir, 'com.apple.small.plist')
+    os.mkdir(_outdir)
+
+    try:
+        runsphinx(src, 'html')
+        assert_not_in(b'com.example.small', readfile('index.html'))
+
+        # index.rst is left untouched, so only the changed directory listing can make it outdated.
+        shutil.copyfile(os.path.join(_fixturedir, 'com.example.small.plist'), added)
+        Sphinx(_srcdir, _fixturedir, _outdir, _outdir, 'html').build()
+        assert_in(b'com.example.small', readfile('index.html'))
+    finally:
+        if os.path.exists(added):
+            os.unlink(added)
+        os.unlink(os.path.join(_srcdir, 'index.rst'))
+        shutil.rmtree(_outdir)
+
+
+@with_runsphinx('html')
+def test_buildhtml_pfmindex_sort_version():
+    """Sort the manifest summary table by minimum macOS version.
+
+    .. pfmindex:: .
+       :sort: macos
+    """
+    content = readfile('index.html')
+    assert_less(content.index(b'com.apple.font'), content.index(b'com.example.small'))
+
+
+@with_runsphinx('html')
+def test_buildhtml_manifest_font_lazy():
+    """Generate a lazily loaded HTML table from font payload preferences manifest.
+
+    .. pfm:: com.apple.fontmanifest.plist
+       :render: lazy
+    """
+    content = readfile('index.html')
+    assert_in(b'pfm-lazy', content)
+    assert_true(glob.glob(os.path.join(_outdir, '_static', 'pfm', '*.json.gz')))
+    assert_true(glob.glob(os.path.join(_outdir, '_static', 'pfm', '*.json')))
+
+
+@with_runsphinx('epub')
+def test_buildepub_manifest_font_lazy():
+    """Fall back to the static table when building an epub.
+
+    .. pfm:: com.apple.fontmanifest.plist
+       :render: lazy
+    """
+    content = readfile('index.xhtml')
+    assert_not_in(b'pfm-lazy', content)
+    assert_in(b'The contents of the font file.', content)
+
+
+@with_runsphinx('html')
+def test_buildhtml_pfmkey_patterns():
+    """Generate sections for several keys of font payload preferences manifest.
+
+    .. pfmkey:: Name, **:Font* com.apple.fontmanifest.plist
+    """
+    content = readfile('index.html')
+    assert_in(b'Name', content)
+    assert_in(b'Font', content)
+
+
+@with_runsphinx('html')
+def test_buildhtml_pfmprofile_font():
+    """Generate HTML for a font configuration profile against the font payload preferences manifest.
+
+    .. pfmprofile:: font.mobileconfig
+       :manifests: .
+    """
+    content = readfile('index.html')
+    assert_in(b'Example Sans', content)
+    assert_in(b'&lt;data, 4 bytes&gt;', content)
+
+
+def test_buildhtml_pfmprofile_added_manifest():
+    """Rebuild a configuration profile page incrementally when the manifest for a payload is added."""
+    src = '.. pfmprofile:: font.mobileconfig\n   :manifests: .\n   :pattern: com.apple.font*.plist\n'
+    moved = os.path.join(_srcdir, 'font.manifest')
+    os.rename(os.path.join(_srcdir, 'com.apple.fontmanifest.plist'), moved)
+    os.mkdir(_outdir)
+
+    try:
+        runsphinx(src, 'html')
+        assert_not_in(b'The contents of the font file.', readfile('index.html'))
+
+        # index.rst is left untouched, so only the changed directory listing can make it outdated.
+        os.rename(moved, os.path.join(_srcdir, 'com.apple.fontmanifest.plist'))
+        Sphinx(_srcdir, _fixturedir, _outdir, _outdir, 'html').build()
+        assert_in(b'The contents of the font file.', readfile('index.html'))
+    finally:
+        if os.path.exists(moved):
+            os.rename(moved, os.path.join(_srcdir, 'com.apple.fontmanifest.plist'))
+        os.unlink(os.path.join(_srcdir, 'index.rst'))
+        shutil.rmtree(_outdir)
@@ -0,0 +1,93 @@
+import plistlib
+
+from sphinxcontrib.pfmanifest.index import compile_key_pattern, format_value, index_subkeys, match_subkey_paths, \
+    match_subkey_patterns, split_key_patterns, version_tuple
+
+from nose.tools import *
+
+
+_manifest = {
+    'pfm_domain': 'com.apple.wifi.managed',
+    'pfm_subkeys': [
+        {'pfm_name': 'SSID_STR'},
+        {'pfm_name': 'Password'},
+        {'pfm_name': 'EAPClientConfiguration', 'pfm_subkeys': [
+            {'pfm_name': 'UserPassword'},
+            {'pfm_name': 'AcceptEAPTypes'},
+            {'pfm_name': 'TLSTrust', 'pfm_subkeys': [
+                {'pfm_name': 'PasswordHint'},
+            ]},
+            {'pfm_type': 'dictionary'},
+        ]},
+        {'pfm_name': 'SSID_STR', 'pfm_title': 'Duplicate'},
+    ]
+}
+
+
+def paths(pattern):
+    return [':'.join(p) for p, _ in match_subkey_paths(index_subkeys(_manifest), pattern)]
+
+
+def test_index_subkeys():
+    index = index_subkeys(_manifest)
+    assert_equal(list(index)[:3], [('SSID_STR',), ('Password',), ('EAPClientConfiguration',)])
+    assert_not_in('pfm_title', index[('SSID_STR',)])
+    assert_equal(len(index), 7)
+
+
+def test_exact_path():
+    assert_equal(paths('EAPClientConfiguration:AcceptEAPTypes'), ['EAPClientConfiguration:AcceptEAPTypes'])
+    assert_equal(paths('AcceptEAPTypes'), [])
+
+
+def test_single_segment_wildcards():
+    assert_equal(paths('EAPClientConfiguration:*'), ['EAPClientConfiguration:UserPassword',
+                                                     'EAPClientConfiguration:AcceptEAPTypes',
+                                                     'EAPClientConfiguration:TLSTrust'])
+    assert_equal(paths('?SID_STR'), ['SSID_STR'])
+    assert_equal(paths('?SID'), [])
+
+
+def test_double_star_start():
+    assert_equal(paths('**:Password*'), ['Password', 'EAPClientConfiguration:TLSTrust:PasswordHint'])
+    assert_equal(paths('**:*Password'), ['Password', 'EAPClientConfiguration:UserPassword'])
+
+
+def test_double_star_middle():
+    assert_equal(paths('EAPClientConfiguration:**:PasswordHint'), ['EAPClientConfiguration:TLSTrust:PasswordHint'])
+    assert_equal(paths('EAPClientConfiguration:**:UserPassword'), ['EAPClientConfiguration:UserPassword'])
+
+
+def test_double_star_end():
+    assert_equal(paths('EAPClientConfiguration:**'), ['EAPClientConfiguration:UserPassword',
+                                                      'EAPClientConfiguration:AcceptEAPTypes',
+                                                      'EAPClientConfiguration:TLSTrust',
+                                                      'EAPClientConfiguration:TLSTrust:PasswordHint'])
+    assert_not_in('EAPClientConfiguration', paths('EAPClientConfiguration:**'))
+
+
+def test_pattern_escapes_regex():
+    assert_true(compile_key_pattern('a.b').match('a.b'))
+    assert_false(compile_key_pattern('a.b').match('axb'))
+
+
+def test_split_key_patterns():
+    assert_equal(split_key_patterns('SSID_STR, EAPClientConfiguration:* ,Password'),
+                 ['SSID_STR', 'EAPClientConfiguration:*', 'Password'])
+
+
+def test_match_subkey_patterns_deduplicates():
+    matches, unmatched = match_subkey_patterns(index_subkeys(_manifest), ['**:*Password', 'Password', 'Missing'])
+    assert_equal([p for p, _ in matches], [('Password',), ('EAPClientConfiguration', 'UserPassword')])
+    assert_equal(unmatched, ['Missing'])
+
+
+def test_version_tuple():
+    assert_equal(sorted(['10.13', '10.9', 10.7, '9'], key=version_tuple), ['9', 10.7, '10.9', '10.13'])
+
+
+def test_format_value():
+    data = plistlib.Data(b'\x00\x01\x00\x00') if hasattr(plistlib, 'Data') else b'\x00\x01\x00\x00'
+    assert_equal(format_value(data), u'<data, 4 bytes>')
+    assert_equal(format_value(['a', 'b']), u'a, b')
+    assert_equal(format_value([{'B': 2, 'A': ['x', 'y']}]), u'{A: [x, y], B: 2}')